@@ -9,23 +9,155 @@ Sub-commands:
   - fetch-commits
 """
 
+from __future__ import annotations
+
 import os
+import re
+import time
+import asyncio
+import contextlib
+import threading
+import tempfile
+import warnings
+import subprocess
 import argparse
-import pandas as pd
-from github import Github, Auth
+from datetime import datetime, timezone
+
+# pandas, pyarrow and PyGitHub are imported where they are used so the CLI
+# (e.g. `--help`) starts without paying for them. `Github` is bound lazily by
+# _github_client().
+Github = None
+
+GITHUB_API_URL = "https://api.github.com"
+COMMITS_PER_PAGE = 100
+MAX_RETRIES = 5
+HTTP_TIMEOUT = 30  # seconds per request on the threaded requests.Session path
+COMMIT_COLUMNS = ['sha', 'author', 'email', 'date', 'message']
+# Upper bound on rows pre-allocated from `max_commits` (~8 MB per column list)
+PREALLOC_LIMIT = 1_000_000
+CSV_BATCH_SIZE = 1000  # rows buffered per Arrow record batch when streaming CSV
+
+# Only the fields we keep, up to 100 commits per round-trip
+GRAPHQL_COMMITS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: $first, after: $after) {
+            pageInfo { endCursor hasNextPage }
+            nodes { oid messageHeadline author { name email date } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# `git log` fields separated by ASCII unit separators and records terminated by
+# a record separator, so commit subjects cannot break parsing. Dates use %ad
+# with --date=iso-strict-local under TZ=UTC, so they all come out in UTC.
+GIT_LOG_FORMAT = '%H%x1f%an%x1f%ae%x1f%ad%x1f%s%x1e'
+GIT_CLONE_URL = "https://github.com/{repo_name}.git"
+# Above this many commits (or with no limit) a bare clone beats the REST API
+GIT_SOURCE_THRESHOLD = 10000
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'repo_miner')
+DEFAULT_RATE_LIMIT = 5000  # requests/hour per token, until GitHub tells us otherwise
+
+def _read_tokens() -> list:
+    """
+    Read GitHub tokens from the environment. `GITHUB_TOKENS` holds a
+    comma-separated list; a single `GITHUB_TOKEN` is used when it is unset.
+    """
+    raw = os.getenv('GITHUB_TOKENS', os.getenv('GITHUB_TOKEN', ''))
+    tokens = [t.strip() for t in raw.split(',') if t.strip()]
+    if not tokens:
+        raise ValueError("GITHUB_TOKEN environment variable not set")
+    return tokens
+
+class TokenPool:
+    """
+    Spread requests across several GitHub tokens. `acquire` hands out the
+    token with the most remaining quota; when every token is exhausted it
+    sleeps until the earliest rate-limit reset.
+    """
+
+    def __init__(self, tokens: list):
+        self._entries = {
+            token: {'remaining': DEFAULT_RATE_LIMIT, 'reset': 0.0} for token in tokens
+        }
+        # Guards the counters when the pool is shared by worker threads
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> tuple:
+        """
+        Reserve one request on the token with the most remaining quota.
+        Returns (token, 0), or (None, seconds) to wait for the earliest reset.
+        """
+        with self._lock:
+            token = max(self._entries, key=lambda t: self._entries[t]['remaining'])
+            entry = self._entries[token]
+            if entry['remaining'] > 0:
+                # Reserve the request now so concurrent callers spread out
+                entry['remaining'] -= 1
+                return token, 0
+            earliest_reset = min(e['reset'] for e in self._entries.values())
+            return None, max(earliest_reset - time.time(), 1)
+
+    def _refill(self) -> None:
+        """Restore the quota of tokens whose rate-limit window has reset."""
+        with self._lock:
+            now = time.time()
+            for e in self._entries.values():
+                if e['reset'] <= now:
+                    e['remaining'] = DEFAULT_RATE_LIMIT
+
+    async def acquire(self) -> str:
+        while True:
+            token, wait = self._reserve()
+            if token is not None:
+                return token
+            await asyncio.sleep(wait)
+            self._refill()
+
+    def acquire_blocking(self) -> str:
+        """Thread-friendly `acquire` for the requests.Session path."""
+        while True:
+            token, wait = self._reserve()
+            if token is not None:
+                return token
+            time.sleep(wait)
+            self._refill()
+
+    def update(self, token: str, headers) -> None:
+        """Record the quota GitHub reported for `token` in a response."""
+        with self._lock:
+            entry = self._entries[token]
+            if 'X-RateLimit-Remaining' in headers:
+                entry['remaining'] = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                entry['reset'] = float(headers['X-RateLimit-Reset'])
+
+def _github_client(token: str):
+    """Return a PyGitHub client, importing PyGitHub on first use."""
+    global Github
+    if Github is None:
+        from github import Github
+    return Github(token)
 
 def fetch_issues(repo_name: str, state: str = "all", max_issues: int = None) -> pd.DataFrame:
     """
     Fetch up to `max_issues` from the specified GitHub repository (issues only).
     Returns a DataFrame with columns: id, number, title, user, state, created_at, closed_at, comments.
     """
-    # 1) Read GitHub token
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
-        raise ValueError("GITHUB_TOKEN environment variable not set")
+    import pandas as pd
+
+    # 1) Read GitHub token (first of GITHUB_TOKENS, else GITHUB_TOKEN)
+    token = _read_tokens()[0]
 
     # 2) Initialize client and get the repo
-    g = Github(token)
+    g = _github_client(token)
     repo = g.get_repo(repo_name)
 
     # 3) Fetch issues, filtered by state ('all', 'open', 'closed')
@@ -61,44 +193,668 @@ def fetch_issues(repo_name: str, state: str = "all", max_issues: int = None) ->
     df = pd.DataFrame(records)
     return df
 
-def fetch_commits(repo_name: str, max_commits: int = None) -> pd.DataFrame:
+def _parse_last_page(link_header: str) -> int:
     """
-    Fetch up to `max_commits` from the specified GitHub repository.
-    Returns a DataFrame with columns: sha, author, email, date, message.
+    Return the page number of the rel="last" entry in a GitHub `Link` header.
+    A missing header (or no "last" entry) means everything fit on one page.
     """
-    # 1) Read GitHub token from environment
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
-        raise ValueError("GITHUB_TOKEN environment variable not set")
+    if not link_header:
+        return 1
+    for part in link_header.split(','):
+        if 'rel="last"' in part:
+            match = re.search(r'[?&]page=(\d+)', part)
+            if match:
+                return int(match.group(1))
+    return 1
 
-    # 2) Initialize GitHub client and get the repo
-    g = Github(token)
-    repo = g.get_repo(repo_name)
+def _normalize_rest_commit(item: dict) -> tuple:
+    """
+    Normalize one commit object from the REST commits endpoint into a
+    (sha, author, email, date, message) row. The date is left as GitHub's ISO
+    string and the message is the full text (None when unknown/empty).
+    """
+    commit = item.get('commit') or {}
+    author = commit.get('author')
+    if author is not None:
+        author_name = author.get('name')
+        email = author.get('email')
+        # GitHub sends "...Z"; match datetime.isoformat() used by PyGitHub
+        date_iso = author.get('date', '').replace('Z', '+00:00')
+    else:
+        author_name = email = "Unknown"
+        date_iso = None
+    return (item['sha'], author_name, email, date_iso, commit.get('message') or None)
 
-    # 3) Fetch commit objects (paginated by PyGitHub)
-    commits_data = []
+def _iter_commit_rows(repo, max_commits: int = None):
+    """
+    Yield up to `max_commits` (sha, author, email, date, message) rows from a
+    PyGitHub repository object. The date is the raw `datetime` and the
+    message the full text (None when unknown/empty); formatting is left to
+    the consumer.
+    """
     commit_count = 0
-    
     for commit in repo.get_commits():
         if max_commits and commit_count >= max_commits:
             break
 
-        # 4) Normalize each commit into a record dict
-        commit_data = {
-            'sha': commit.sha,
-            'author': commit.commit.author.name if commit.commit.author else "Unknown",
-            'email': commit.commit.author.email if commit.commit.author else "Unknown",
-            'date': commit.commit.author.date.isoformat() if commit.commit.author else "Unknown",
-            'message': commit.commit.message.split('\n')[0] if commit.commit.message else "No message"
-        }
-        
-        commits_data.append(commit_data)
+        # Resolve the commit/author objects once; PyGitHub attribute access is
+        # not free (lazy completion via __getattr__)
+        c = commit.commit
+        a = c.author
+        if a is not None:
+            author_name, email, date = a.name, a.email, a.date
+        else:
+            author_name = email = "Unknown"
+            date = None
+
+        yield (commit.sha, author_name, email, date, c.message or None)
         commit_count += 1
 
-    # 5) Build DataFrame from records
-    df = pd.DataFrame(commits_data)
+def _page_has_sha(page: list, sha: str) -> bool:
+    """Return True if the REST commits `page` contains commit `sha`."""
+    return any(item['sha'] == sha for item in page)
+
+async def _request_json(session, method: str, url: str, pool: TokenPool, **kwargs):
+    """
+    Send one request (extra `kwargs` go to aiohttp, e.g. params/json) using a
+    token from `pool`, retrying when GitHub signals a rate limit. An exhausted
+    token is marked in the pool so the retry rotates to another one;
+    `Retry-After` (secondary limits) is slept.
+    Returns (json_body, response_headers).
+    """
+    for _ in range(MAX_RETRIES):
+        token = await pool.acquire()
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f'Bearer {token}',
+        }
+        async with session.request(method, url, headers=headers, **kwargs) as resp:
+            pool.update(token, resp.headers)
+            if resp.status in (403, 429):
+                retry_after = resp.headers.get('Retry-After')
+                if retry_after is not None:
+                    await asyncio.sleep(int(retry_after))
+                    continue
+                if resp.headers.get('X-RateLimit-Remaining') == '0':
+                    continue
+            resp.raise_for_status()
+            return await resp.json(), resp.headers
+    raise RuntimeError(f"GitHub rate limit retries exhausted for {url}")
+
+async def _fetch_commits_async(repo_name: str, max_commits: int, tokens: list,
+                               concurrency: int = 8, stop_sha: str = None) -> list:
+    """
+    Fetch commit rows from the REST commits endpoint, requesting pages
+    concurrently (at most `concurrency` in flight) over one aiohttp session
+    and rotating through `tokens` to stay under each token's rate limit.
+    With `stop_sha` (e.g. a cache's newest commit), pages are requested in
+    batches of `concurrency` and no batch is started after one containing it.
+    """
+    import aiohttp
+
+    url = f"{GITHUB_API_URL}/repos/{repo_name}/commits"
+    pool = TokenPool(tokens)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession() as session:
+        # 1) First page tells us how many pages there are
+        first, first_headers = await _request_json(
+            session, 'GET', url, pool, params={'per_page': COMMITS_PER_PAGE, 'page': 1})
+        last_page = _parse_last_page(first_headers.get('Link'))
+        if max_commits:
+            last_page = min(last_page, -(-max_commits // COMMITS_PER_PAGE))
+
+        # 2) Remaining pages in parallel, bounded by the semaphore
+        async def fetch(page):
+            async with semaphore:
+                body, _ = await _request_json(
+                    session, 'GET', url, pool,
+                    params={'per_page': COMMITS_PER_PAGE, 'page': page})
+                return body
+
+        pages = range(2, last_page + 1)
+        batch_size = concurrency if stop_sha else len(pages) or 1
+        rest = []
+        seen_stop = bool(stop_sha) and _page_has_sha(first, stop_sha)
+        for start in range(0, len(pages), batch_size):
+            if seen_stop:
+                break
+            batch = await asyncio.gather(*(fetch(p) for p in pages[start:start + batch_size]))
+            rest += batch
+            seen_stop = bool(stop_sha) and any(_page_has_sha(page, stop_sha) for page in batch)
+
+    # 3) gather() preserves page order, so rows stay newest-first
+    rows = [_normalize_rest_commit(item) for page in [first, *rest] for item in page]
+    return rows[:max_commits] if max_commits else rows
+
+def _session_get_json(session, url: str, pool: TokenPool, params: dict):
+    """
+    Blocking counterpart of _request_json for a `requests.Session`: GET one
+    page of JSON with a token from `pool` (and an HTTP_TIMEOUT), retrying on
+    rate limits. Returns (json_body, response_headers).
+    """
+    for _ in range(MAX_RETRIES):
+        token = pool.acquire_blocking()
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f'Bearer {token}',
+        }
+        resp = session.get(url, params=params, headers=headers, timeout=HTTP_TIMEOUT)
+        pool.update(token, resp.headers)
+        if resp.status_code in (403, 429):
+            retry_after = resp.headers.get('Retry-After')
+            if retry_after is not None:
+                time.sleep(int(retry_after))
+                continue
+            if resp.headers.get('X-RateLimit-Remaining') == '0':
+                continue
+        resp.raise_for_status()
+        return resp.json(), resp.headers
+    raise RuntimeError(f"GitHub rate limit retries exhausted for {url}")
+
+def _fetch_pages_threaded(repo_name: str, pool: TokenPool, pages, session,
+                          max_workers: int = 8) -> list:
+    """
+    Fetch the given REST commit `pages` on a thread pool sharing one
+    `requests.Session`, so requests reuse its keep-alive connections.
+    Returns the page bodies in `pages` order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    url = f"{GITHUB_API_URL}/repos/{repo_name}/commits"
+
+    def fetch(page):
+        body, _ = _session_get_json(
+            session, url, pool, {'per_page': COMMITS_PER_PAGE, 'page': page})
+        return body
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, pages))
+
+def _fetch_commits_threaded(repo_name: str, max_commits: int, tokens: list,
+                            concurrency: int = 8, stop_sha: str = None) -> list:
+    """
+    Fetch commit rows from the REST commits endpoint with `concurrency`
+    threads over one keep-alive `requests.Session`, rotating through
+    `tokens` like the aiohttp path (including its `stop_sha` batching).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    url = f"{GITHUB_API_URL}/repos/{repo_name}/commits"
+    pool = TokenPool(tokens)
+    with requests.Session() as session:
+        # Keep one pooled connection per worker instead of requests' default 10
+        session.mount('https://', HTTPAdapter(pool_maxsize=concurrency))
+
+        # 1) First page tells us how many pages there are
+        first, first_headers = _session_get_json(
+            session, url, pool, {'per_page': COMMITS_PER_PAGE, 'page': 1})
+        last_page = _parse_last_page(first_headers.get('Link'))
+        if max_commits:
+            last_page = min(last_page, -(-max_commits // COMMITS_PER_PAGE))
+
+        # 2) Remaining pages on the thread pool
+        pages = range(2, last_page + 1)
+        batch_size = concurrency if stop_sha else len(pages) or 1
+        rest = []
+        seen_stop = bool(stop_sha) and _page_has_sha(first, stop_sha)
+        for start in range(0, len(pages), batch_size):
+            if seen_stop:
+                break
+            batch = _fetch_pages_threaded(repo_name, pool, pages[start:start + batch_size],
+                                          session, concurrency)
+            rest += batch
+            seen_stop = bool(stop_sha) and any(_page_has_sha(page, stop_sha) for page in batch)
+
+    # 3) executor.map() preserves page order, so rows stay newest-first
+    rows = [_normalize_rest_commit(item) for page in [first, *rest] for item in page]
+    return rows[:max_commits] if max_commits else rows
+
+def _normalize_graphql_commit(node: dict) -> tuple:
+    """
+    Normalize one `history` node from the GraphQL API into a
+    (sha, author, email, date, message) row.
+    """
+    author = node.get('author')
+    if author is not None:
+        author_name, email, date_iso = author.get('name'), author.get('email'), author.get('date')
+    else:
+        author_name = email = "Unknown"
+        date_iso = None
+    return (node['oid'], author_name, email, date_iso, node.get('messageHeadline') or None)
+
+async def _fetch_commits_graphql(repo_name: str, max_commits: int, tokens: list,
+                                 stop_sha: str = None) -> list:
+    """
+    Fetch commit rows from the default branch through the GraphQL API,
+    paginating with the history cursor and selecting only the fields we keep.
+    Stops after the page containing `stop_sha`, if given.
+    """
+    import aiohttp
+
+    owner, name = repo_name.split('/', 1)
+    pool = TokenPool(tokens)
+    rows = []
+    after = None
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            first = COMMITS_PER_PAGE
+            if max_commits:
+                first = min(first, max_commits - len(rows))
+            variables = {'owner': owner, 'name': name, 'first': first, 'after': after}
+            body, _ = await _request_json(
+                session, 'POST', f"{GITHUB_API_URL}/graphql", pool,
+                json={'query': GRAPHQL_COMMITS_QUERY, 'variables': variables})
+            if body.get('errors'):
+                raise RuntimeError(f"GitHub GraphQL error: {body['errors'][0].get('message')}")
+
+            branch = body['data']['repository']['defaultBranchRef']
+            if branch is None:  # empty repository
+                break
+            history = branch['target']['history']
+            rows.extend(_normalize_graphql_commit(node) for node in history['nodes'])
+
+            if not history['pageInfo']['hasNextPage']:
+                break
+            if stop_sha and any(node['oid'] == stop_sha for node in history['nodes']):
+                break
+            if max_commits and len(rows) >= max_commits:
+                break
+            after = history['pageInfo']['endCursor']
+
+    return rows
+
+def _parse_git_log(chunks):
+    """
+    Yield (sha, author, email, date, message) rows from `git log` output in
+    GIT_LOG_FORMAT, given as an iterable of text chunks (e.g. a pipe's lines).
+    """
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        *records, buffer = buffer.split('\x1e')
+        for record in records:
+            sha, author_name, email, date_iso, subject = record.lstrip('\n').split('\x1f')
+            yield (sha, author_name, email, date_iso, subject or None)
+
+def _git_clone_or_fetch(repo_name: str, git_dir: str, env: dict) -> str:
+    """
+    Bare-clone `repo_name` into `git_dir` (no blobs, no working tree), or,
+    if `git_dir` already holds such a clone, fetch only what is new into it.
+    Returns None on success, else the error message.
+    """
+    if os.path.exists(os.path.join(git_dir, 'HEAD')):
+        cmd = ["git", "-C", git_dir, "fetch", "--quiet", "--prune", "origin",
+               "+refs/heads/*:refs/heads/*"]
+    else:
+        cmd = ["git", "clone", "--bare", "--filter=blob:none", "--quiet",
+               GIT_CLONE_URL.format(repo_name=repo_name), git_dir]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    except OSError as e:
+        # e.g. FileNotFoundError when git is not installed
+        return str(e)
+    return result.stderr.strip() if result.returncode != 0 else None
+
+def _iter_git_commit_rows(repo_name: str, max_commits: int = None, fallback=None,
+                          clone_dir: str = None):
+    """
+    Yield commit rows by bare-cloning the repository and streaming `git log`.
+    The clone goes to a temporary directory, or is kept in `clone_dir` and
+    updated with `git fetch` on later calls. If cloning/fetching fails (e.g. a
+    private repo without local git credentials, or no git binary), rows come
+    from `fallback()` instead.
+    Raises RuntimeError if `git log` itself fails.
+    """
+    env = {**os.environ, 'GIT_TERMINAL_PROMPT': '0', 'TZ': 'UTC'}
+    git_dirs = contextlib.nullcontext(clone_dir) if clone_dir else tempfile.TemporaryDirectory()
+    with git_dirs as tmpdir:
+        error = _git_clone_or_fetch(repo_name, tmpdir, env)
+        if error is not None:
+            if fallback is None:
+                raise RuntimeError(f"git clone of {repo_name} failed: {error}")
+            warnings.warn(f"git clone of {repo_name} failed, falling back to the REST API")
+            yield from fallback()
+            return
+
+        # An empty repository has no HEAD, and `git log` would fail on it
+        head = subprocess.run(["git", "-C", tmpdir, "rev-parse", "--verify", "--quiet", "HEAD"],
+                              capture_output=True, env=env)
+        if head.returncode != 0:
+            return
+
+        cmd = ["git", "-C", tmpdir, "log", "--date=iso-strict-local",
+               f"--pretty=format:{GIT_LOG_FORMAT}"]
+        if max_commits:
+            cmd.append(f"-n{max_commits}")
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              encoding='utf-8', errors='replace', env=env) as proc:
+            yield from _parse_git_log(proc.stdout)
+            stderr = proc.stderr.read()
+        if proc.returncode != 0:
+            raise RuntimeError(f"git log of {repo_name} failed: {stderr.strip()}")
+
+def _commit_rows(repo_name: str, max_commits: int = None, concurrency: int = None,
+                 source: str = "api", http_client: str = "aiohttp",
+                 stop_sha: str = None, cache_dir: str = None):
+    """
+    Return an iterable of up to `max_commits` normalized commit rows.
+    `source="git"` reads them from a bare clone (kept in `cache_dir`, if given)
+    and `source="graphql"` from the GraphQL API; otherwise they come from the
+    REST API, concurrently when `concurrency` is set (via aiohttp, or a thread
+    pool over a requests.Session with `http_client="threads"`), else through
+    PyGitHub. Eager sources stop requesting pages once they have seen
+    `stop_sha`; lazy ones (PyGitHub, git) stop when the consumer does.
+    """
+    if source == "git":
+        return _iter_git_commit_rows(
+            repo_name, max_commits,
+            fallback=lambda: _commit_rows(repo_name, max_commits, concurrency, "api",
+                                          http_client, stop_sha),
+            clone_dir=_cache_path(cache_dir, repo_name, '.git') if cache_dir else None)
+
+    tokens = _read_tokens()
+    if source == "graphql":
+        return asyncio.run(_fetch_commits_graphql(repo_name, max_commits, tokens, stop_sha))
+    if concurrency:
+        if http_client == "threads":
+            return _fetch_commits_threaded(repo_name, max_commits, tokens, concurrency,
+                                           stop_sha)
+        return asyncio.run(_fetch_commits_async(repo_name, max_commits, tokens, concurrency,
+                                                stop_sha))
+    g = _github_client(tokens[0])
+    repo = g.get_repo(repo_name)
+    return _iter_commit_rows(repo, max_commits)
+
+def _cache_path(cache_dir: str, repo_name: str, suffix: str = '.parquet') -> str:
+    """
+    Return the path caching `repo_name` in `cache_dir`: the parquet file of
+    its commits, or with `suffix=".git"` the bare clone used by the git source.
+    """
+    return os.path.join(cache_dir, repo_name.replace('/', '_') + suffix)
+
+def _probe_commits_etag(repo_name: str, etag: str = None) -> tuple:
+    """
+    Conditionally request the newest commit of `repo_name` with
+    `If-None-Match: etag`. GitHub answers 304 Not Modified, which does not
+    count against the rate limit, when the commit list is unchanged.
+    Returns (not_modified, etag); (False, None) if the request fails.
+    """
+    import requests
+
+    headers = {'Accept': 'application/vnd.github+json'}
+    try:
+        headers['Authorization'] = f'Bearer {_read_tokens()[0]}'
+    except ValueError:
+        pass  # unauthenticated probes still work for public repos
+    if etag:
+        headers['If-None-Match'] = etag
+
+    try:
+        resp = requests.get(f"{GITHUB_API_URL}/repos/{repo_name}/commits",
+                            params={'per_page': 1}, headers=headers, timeout=10)
+    except requests.RequestException:
+        return False, None
+    if resp.status_code == 304:
+        return True, etag
+    if resp.ok:
+        return False, resp.headers.get('ETag')
+    return False, None
+
+def _load_cache(cache_dir: str, repo_name: str, max_commits: int = None) -> tuple:
+    """
+    Load `repo_name`'s cached commits from `cache_dir` and check with a
+    conditional (ETag) request whether they are current.
+    Returns (cached, stop_sha, not_modified, etags): `cached` is None without
+    a cache file; `stop_sha` is the cached head, set only when the cache
+    reaches as deep as `max_commits` asks (it may be a prefix left by an
+    earlier capped fetch); `not_modified` means the cache can be returned
+    as is; `etags` are the ETags to store with the cache.
+    """
+    import pandas as pd
+
+    cached = None
+    stop_sha = None
+    etags = {}
+    cache_file = _cache_path(cache_dir, repo_name)
+    if os.path.exists(cache_file):
+        cached = pd.read_parquet(cache_file)
+        etags = dict(cached.attrs.get('etags', {}))
+        covers = cached.attrs.get('complete', False) or bool(
+            max_commits and len(cached) >= max_commits)
+        if len(cached) and covers:
+            stop_sha = cached.iloc[0]['sha']
+
+    # A 304 means the cached head is unchanged, which is enough only if the
+    # cache also reaches the requested depth
+    probe_key = f"{GITHUB_API_URL}/repos/{repo_name}/commits?per_page=1"
+    not_modified, etag = _probe_commits_etag(repo_name, etags.get(probe_key))
+    if etag:
+        etags[probe_key] = etag
+    return cached, stop_sha, not_modified and stop_sha is not None, etags
+
+def _prepend_to_cache(new_df: pd.DataFrame, cached: pd.DataFrame) -> pd.DataFrame:
+    """Return `new_df`'s commits followed by the cached (older) ones."""
+    import pandas as pd
+
+    if not len(new_df):
+        return cached
+    # concat keeps the inputs' separate blocks; one deep copy consolidates
+    # them so later column ops/groupbys see one block per dtype
+    return pd.concat([new_df, cached], ignore_index=True).copy()
+
+def _update_cache(df: pd.DataFrame, cached: pd.DataFrame, reached_cache: bool,
+                  cache_dir: str, repo_name: str, max_commits: int = None,
+                  etags: dict = None) -> pd.DataFrame:
+    """
+    Combine freshly fetched commits `df` with the `cached` ones (None if there
+    is no cache) and persist the result with its `etags` and whether it now
+    holds the complete history. A fetch not cut off by `max_commits` is
+    complete; a capped one is a prefix, and never replaces a cache that
+    reaches deeper. Returns the combined DataFrame.
+    """
+    cache_complete = cached is not None and bool(cached.attrs.get('complete', False))
+    write_cache = True
+    if reached_cache:
+        df = _prepend_to_cache(df, cached)
+        complete = cache_complete
+    elif not (max_commits and len(df) >= max_commits):
+        complete = True
+    else:
+        complete = False
+        # Where the capped fetch ran into the cached head, if it did
+        head = []
+        if cached is not None and len(cached):
+            head = df.index[df['sha'] == cached.iloc[0]['sha']]
+        if len(head) and head[0] + len(cached) > len(df):
+            # Keep the deeper cache behind the new commits
+            df = _prepend_to_cache(df.iloc[:head[0]], cached)
+            complete = cache_complete
+        else:
+            # A shorter, unrelated slice (history rewritten, or more new
+            # commits than `max_commits`) must not replace a deeper cache
+            write_cache = cached is None or len(df) >= len(cached)
+    if write_cache:
+        df.attrs['etags'] = etags or {}
+        df.attrs['complete'] = complete
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_parquet(_cache_path(cache_dir, repo_name), index=False)
     return df
-    
+
+def _rows_to_frame(rows, max_commits: int = None, stop_sha: str = None) -> tuple:
+    """
+    Build the commits DataFrame column-wise from normalized `rows`, stopping
+    before `stop_sha`. Returns (df, stopped), where `stopped` tells whether
+    `stop_sha` was reached.
+    """
+    import pandas as pd
+
+    # Split rows into per-column lists. With a known `max_commits` the lists
+    # are pre-sized and filled by index, so they never regrow; anything past
+    # PREALLOC_LIMIT is appended.
+    n = min(max_commits or 0, PREALLOC_LIMIT)
+    sha, author, email, date, message = ([None] * n for _ in range(5))
+    stopped = False
+    i = 0
+    for c_sha, c_author, c_email, c_date, c_message in rows:
+        if stop_sha is not None and c_sha == stop_sha:
+            stopped = True
+            break
+        if i < n:
+            sha[i] = c_sha
+            author[i] = c_author
+            email[i] = c_email
+            date[i] = c_date
+            message[i] = c_message
+        else:
+            sha.append(c_sha)
+            author.append(c_author)
+            email.append(c_email)
+            date.append(c_date)
+            message.append(c_message)
+        i += 1
+
+    # Trim unused slots when the repo had fewer commits than `max_commits`
+    if i < n:
+        sha, author, email, date, message = sha[:i], author[:i], email[:i], date[:i], message[:i]
+
+    # No row -> column pivot
+    df = pd.DataFrame({
+        'sha': sha,
+        'author': author,
+        'email': email,
+        'date': date,
+        'message': message,
+    }, index=pd.RangeIndex(len(sha)), copy=False)
+
+    # Parse all dates and cut messages to their first line in vectorized
+    # passes (datetime64 instead of Python str; one split per column)
+    df['date'] = pd.to_datetime(df['date'], utc=True)
+    if len(df):
+        df['message'] = df['message'].str.split('\n', n=1).str[0].fillna("No message")
+    return df, stopped
+
+def fetch_commits(repo_name: str, max_commits: int = None,
+                  concurrency: int = None, source: str = "api",
+                  cache_dir: str = None, http_client: str = "aiohttp") -> pd.DataFrame:
+    """
+    Fetch up to `max_commits` from the specified GitHub repository.
+    `source` is "api" (REST), "graphql" (100 commits and only the needed fields
+    per request) or "git" (bare clone + `git log`, much faster for long
+    histories). With the REST API, `concurrency` fetches pages in parallel
+    instead of PyGitHub's one-page-at-a-time pagination, via aiohttp or, with
+    `http_client="threads"`, a thread pool sharing one requests.Session.
+    With `cache_dir`, commits are cached there as parquet. The cache records
+    whether it holds the complete history or only a newest-first prefix;
+    when it covers the requested depth, later calls only fetch commits newer
+    than the cached head, or nothing at all when a conditional (ETag) request
+    shows the commit list is unchanged.
+    Returns a DataFrame with columns: sha, author, email, date, message
+    (`date` is a UTC datetime64 column), indexed by a RangeIndex and with
+    `df.attrs["repo"]` set to `repo_name`.
+    Prefer column-wise access for downstream processing, e.g.
+    `df["author"].value_counts()` or `df["sha"].to_numpy()`, over row-wise
+    `.iloc[i]` lookups in loops.
+    """
+    # 1) Load the cache, if any: where fetching can stop, and whether it is current
+    cached, stop_sha, not_modified, etags = (
+        _load_cache(cache_dir, repo_name, max_commits) if cache_dir
+        else (None, None, False, {}))
+
+    # 2) Fetch normalized commit rows, stopping at the cached head
+    #    (none at all if the cache is current)
+    rows = () if not_modified else _commit_rows(
+        repo_name, max_commits, concurrency, source, http_client,
+        stop_sha=stop_sha, cache_dir=cache_dir)
+
+    # 3) Build the DataFrame
+    df, reached_cache = _rows_to_frame(rows, max_commits, stop_sha)
+
+    # 4) Merge with the cache and persist it
+    if cache_dir:
+        if not_modified:
+            df = cached
+        else:
+            df = _update_cache(df, cached, reached_cache, cache_dir, repo_name,
+                               max_commits, etags)
+        if max_commits:
+            df = df.head(max_commits)
+
+    # 5) Few distinct authors across many commits: store codes, not strings
+    df['author'] = df['author'].astype('category')
+    df['email'] = df['email'].astype('category')
+    df.attrs = {'repo': repo_name}
+    return df
+
+def _first_line(message) -> str:
+    """Return the first line of a commit message, or "No message" if missing."""
+    return message.split('\n', 1)[0] if message else "No message"
+
+def _format_date(value) -> str:
+    """
+    Format a row's date for CSV output: ISO 8601, converted to UTC when it
+    carries an offset (so one file never mixes timezones), or "Unknown" if
+    missing.
+    """
+    if value is None:
+        return "Unknown"
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat()
+
+def _frame_commit_rows(df: pd.DataFrame):
+    """
+    Return (sha, author, email, date, message) rows from a fetch_commits
+    DataFrame, with missing values (NaN/NaT) as None like the row producers.
+    """
+    columns = [df[name].astype(object).where(df[name].notna(), None)
+               for name in COMMIT_COLUMNS]
+    return zip(*columns)
+
+def fetch_commits_to_csv(repo_name: str, out_path: str, max_commits: int = None,
+                         concurrency: int = None, source: str = "api",
+                         cache_dir: str = None, http_client: str = "aiohttp") -> int:
+    """
+    Fetch up to `max_commits` and stream them to `out_path` as CSV in batches
+    of CSV_BATCH_SIZE rows via PyArrow's native CSV writer, without building
+    a DataFrame. With `cache_dir` the commits come from fetch_commits' cache
+    instead, written in the same format. Returns the number of commits written.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    if cache_dir:
+        df = fetch_commits(repo_name, max_commits, concurrency, source, cache_dir,
+                           http_client)
+        rows = _frame_commit_rows(df)
+    else:
+        rows = _commit_rows(repo_name, max_commits, concurrency, source, http_client)
+    schema = pa.schema([(name, pa.string()) for name in COMMIT_COLUMNS])
+
+    commit_count = 0
+    with pacsv.CSVWriter(out_path, schema) as writer:
+        sha, author, email, date, message = [], [], [], [], []
+        for c_sha, c_author, c_email, c_date, c_message in rows:
+            sha.append(c_sha)
+            author.append(c_author)
+            email.append(c_email)
+            date.append(_format_date(c_date))
+            message.append(_first_line(c_message))
+            if len(sha) == CSV_BATCH_SIZE:
+                writer.write_batch(pa.record_batch([sha, author, email, date, message],
+                                                   schema=schema))
+                commit_count += len(sha)
+                sha, author, email, date, message = [], [], [], [], []
+        if sha:
+            writer.write_batch(pa.record_batch([sha, author, email, date, message],
+                                               schema=schema))
+            commit_count += len(sha)
+    return commit_count
+
 def merge_and_summarize(commits_df: pd.DataFrame, issues_df: pd.DataFrame) -> None:
     """
     Takes two DataFrames (commits and issues) and prints:
@@ -106,6 +862,8 @@ def merge_and_summarize(commits_df: pd.DataFrame, issues_df: pd.DataFrame) -> No
       - Issue close rate (closed/total)
       - Average open duration for closed issues (in days)
     """
+    import pandas as pd
+
     # Copy to avoid modifying original data
     commits = commits_df.copy()
     issues  = issues_df.copy()
@@ -167,6 +925,16 @@ def main():
     c1.add_argument("--max",  type=int, dest="max_commits",
                     help="Max number of commits to fetch")
     c1.add_argument("--out",  required=True, help="Path to output commits CSV")
+    c1.add_argument("--concurrency", type=int,
+                    help="Fetch up to N REST commit pages in parallel")
+    c1.add_argument("--http", choices=["aiohttp", "threads"], dest="http_client",
+                    help="Client for --concurrency: asyncio + aiohttp, or a thread pool "
+                         "over one keep-alive requests.Session (default: aiohttp)")
+    c1.add_argument("--source", choices=["git", "api", "graphql"],
+                    help="Read commits from a bare git clone, the REST API or the GraphQL API "
+                         f"(default: git when --max is unset or above {GIT_SOURCE_THRESHOLD})")
+    c1.add_argument("--cache", action="store_true",
+                    help=f"Cache commits in {DEFAULT_CACHE_DIR} and only fetch new ones")
 
     # Sub-command: fetch-issues
     c2 = subparsers.add_parser("fetch-issues", help="Fetch issues and save to CSV")
@@ -186,14 +954,24 @@ def main():
 
     # Dispatch based on selected command
     if args.command == "fetch-commits":
-        df = fetch_commits(args.repo, args.max_commits)
-        df.to_csv(args.out, index=False)
-        print(f"Saved {len(df)} commits to {args.out}")
+        if args.http_client and not args.concurrency:
+            c1.error("--http only applies to concurrent fetches; add --concurrency N")
+        source = args.source
+        if source is None:
+            use_git = not args.max_commits or args.max_commits > GIT_SOURCE_THRESHOLD
+            source = "git" if use_git else "api"
+        cache_dir = DEFAULT_CACHE_DIR if args.cache else None
+        count = fetch_commits_to_csv(args.repo, args.out, args.max_commits,
+                                     args.concurrency, source, cache_dir,
+                                     args.http_client or "aiohttp")
+        print(f"Saved {count} commits to {args.out}")
     elif args.command == "fetch-issues":
         df = fetch_issues(args.repo, args.state, args.max_issues)
         df.to_csv(args.out, index=False)
         print(f"Saved {len(df)} issues to {args.out}")
     elif args.command == "summarize":
+        import pandas as pd
+
         # Read CSVs into DataFrames
         commits_df = pd.read_csv(args.commits)
         issues_df  = pd.read_csv(args.issues)
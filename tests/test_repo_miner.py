@@ -1,10 +1,17 @@
 # tests/test_repo_miner.py
 
 import os
+import asyncio
+import subprocess
 import pandas as pd
 import pytest
-from datetime import datetime, timedelta
-from src.repo_miner import fetch_commits, fetch_issues, merge_and_summarize
+from datetime import datetime, timedelta, timezone
+from src.repo_miner import (fetch_commits, fetch_commits_to_csv, fetch_issues,
+                            merge_and_summarize, main, TokenPool,
+                            _parse_last_page, _normalize_rest_commit,
+                            _normalize_graphql_commit, _parse_git_log, _format_date,
+                            _fetch_pages_threaded, _fetch_commits_async,
+                            _fetch_commits_graphql)
 
 # --- Helpers for dummy GitHub API objects ---
 
@@ -95,6 +102,10 @@ def test_fetch_commits_basic(monkeypatch):
     assert df.iloc[0]["message"] == "Initial commit"
     assert df.iloc[0]["author"] == "Alice"
     assert df.iloc[0]["email"] == "a@example.com"
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert isinstance(df["author"].dtype, pd.CategoricalDtype)
+    assert isinstance(df.index, pd.RangeIndex)
+    assert df.attrs["repo"] == "any/repo"
 
 def test_fetch_commits_limit(monkeypatch):
     # More commits than max_commits
@@ -112,6 +123,20 @@ def test_fetch_commits_limit(monkeypatch):
     assert df.iloc[0]["sha"] == "sha1"
     assert df.iloc[1]["sha"] == "sha2"
 
+def test_fetch_commits_limit_above_available(monkeypatch):
+    # max_commits larger than the history: pre-sized columns are trimmed
+    now = datetime.now()
+    commits = [
+        DummyCommit("sha1", "Alice", "a@example.com", now, "Commit 1"),
+        DummyCommit("sha2", "Bob", "b@example.com", now - timedelta(days=1), "Commit 2"),
+    ]
+    gh_instance._repo = DummyRepo(commits)
+
+    df = fetch_commits("any/repo", max_commits=5)
+    assert len(df) == 2
+    assert list(df["sha"]) == ["sha1", "sha2"]
+    assert df["message"].notna().all()
+
 def test_fetch_commits_empty(monkeypatch):
     # Test that fetch_commits returns empty DataFrame when no commits exist.
     commits = []
@@ -136,6 +161,578 @@ def test_fetch_commits_unknown_author(monkeypatch):
     assert df.iloc[0]["author"] == "Unknown Author"
     assert df.iloc[0]["email"] == "unknown@example.com"
 
+def test_fetch_commits_missing_message(monkeypatch):
+    now = datetime.now()
+    commits = [
+        DummyCommit("sha1", "Alice", "a@example.com", now, ""),
+        DummyCommit("sha2", "Bob", "b@example.com", now, "Subject\n\nBody\nmore"),
+    ]
+    gh_instance._repo = DummyRepo(commits)
+
+    df = fetch_commits("any/repo")
+    assert list(df["message"]) == ["No message", "Subject"]
+
+def test_fetch_commits_cache_fetches_only_new(tmp_path, monkeypatch):
+    # ETag probe always reports a change
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    old = [
+        DummyCommit("sha2", "Bob", "b@example.com", now - timedelta(days=1), "Bug fix"),
+        DummyCommit("sha1", "Alice", "a@example.com", now - timedelta(days=2), "Initial commit"),
+    ]
+    gh_instance._repo = DummyRepo(old)
+    df = fetch_commits("any/repo", cache_dir=str(tmp_path))
+    assert list(df["sha"]) == ["sha2", "sha1"]
+    assert (tmp_path / "any_repo.parquet").exists()
+
+    # Only the new commit is read; iteration stops at the cached head
+    class StopAtCachedHead(DummyRepo):
+        def get_commits(self):
+            for commit in self._commits:
+                yield commit
+                assert commit.sha != "sha2", "read past the cached head"
+
+    new = DummyCommit("sha3", "Charlie", "c@example.com", now, "New feature")
+    gh_instance._repo = StopAtCachedHead([new] + old)
+    df = fetch_commits("any/repo", cache_dir=str(tmp_path))
+    assert list(df["sha"]) == ["sha3", "sha2", "sha1"]
+    assert df.iloc[0]["author"] == "Charlie"
+
+def make_commits(start, stop):
+    """Newest-first dummy commits sha{stop-1} ... sha{start}."""
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    return [DummyCommit(f"sha{i}", "Alice", "a@example.com", now + timedelta(hours=i), f"Commit {i}")
+            for i in reversed(range(start, stop))]
+
+def test_fetch_commits_cache_prefix_is_not_full_history(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    gh_instance._repo = DummyRepo(make_commits(0, 10))
+
+    # A capped fetch only caches a prefix, so deeper requests must go further
+    assert len(fetch_commits("any/repo", max_commits=3, cache_dir=str(tmp_path))) == 3
+    assert len(fetch_commits("any/repo", max_commits=8, cache_dir=str(tmp_path))) == 8
+    df = fetch_commits("any/repo", cache_dir=str(tmp_path))
+    assert list(df["sha"]) == [f"sha{i}" for i in reversed(range(10))]
+
+def test_fetch_commits_capped_fetch_keeps_deeper_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    gh_instance._repo = DummyRepo(make_commits(0, 10))
+    assert len(fetch_commits("any/repo", cache_dir=str(tmp_path))) == 10
+
+    # More new commits than max_commits: the 2-row slice must not replace the cache
+    gh_instance._repo = DummyRepo(make_commits(0, 15))
+    df = fetch_commits("any/repo", max_commits=2, cache_dir=str(tmp_path))
+    assert list(df["sha"]) == ["sha14", "sha13"]
+
+    df = fetch_commits("any/repo", cache_dir=str(tmp_path))
+    assert list(df["sha"]) == [f"sha{i}" for i in reversed(range(15))]
+
+def test_fetch_commits_cache_not_modified(tmp_path, monkeypatch):
+    sent_etags = []
+    def probe(repo_name, etag=None):
+        sent_etags.append(etag)
+        return (etag == '"e1"', '"e1"')
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag', probe)
+
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    gh_instance._repo = DummyRepo([
+        DummyCommit("sha1", "Alice", "a@example.com", now, "Initial commit"),
+    ])
+    fetch_commits("any/repo", cache_dir=str(tmp_path))
+
+    # 304 on the second run: the cache is returned without listing commits
+    class NoFetchRepo:
+        def get_commits(self):
+            raise AssertionError("commits fetched despite 304")
+    gh_instance._repo = NoFetchRepo()
+    df = fetch_commits("any/repo", cache_dir=str(tmp_path))
+    assert sent_etags == [None, '"e1"']
+    assert list(df["sha"]) == ["sha1"]
+    assert df.attrs == {"repo": "any/repo"}
+
+def test_fetch_commits_not_modified_prefix_cache_fetches_deeper(tmp_path, monkeypatch):
+    # 304 only proves the head is unchanged; a capped cache is still too short
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (etag is not None, '"e1"'))
+    gh_instance._repo = DummyRepo(make_commits(0, 10))
+
+    assert len(fetch_commits("any/repo", max_commits=3, cache_dir=str(tmp_path))) == 3
+    assert len(fetch_commits("any/repo", max_commits=2, cache_dir=str(tmp_path))) == 2
+    assert len(fetch_commits("any/repo", cache_dir=str(tmp_path))) == 10
+
+class DummyProbeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+def test_probe_commits_etag(monkeypatch):
+    import requests
+    from src.repo_miner import _probe_commits_etag
+    sent = []
+    responses = [DummyProbeResponse(200, {"ETag": '"e1"'}), DummyProbeResponse(304)]
+    def fake_get(url, params=None, headers=None, timeout=None):
+        sent.append((url, params, dict(headers), timeout))
+        return responses.pop(0)
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setenv("GITHUB_TOKEN", "tok")
+
+    # 200: changed; the new ETag is returned and no If-None-Match is sent
+    assert _probe_commits_etag("any/repo") == (False, '"e1"')
+    # 304: unchanged; the stored ETag went out as If-None-Match
+    assert _probe_commits_etag("any/repo", '"e1"') == (True, '"e1"')
+
+    first, second = sent
+    assert first[0].endswith("/repos/any/repo/commits")
+    assert first[1] == {"per_page": 1}
+    assert "If-None-Match" not in first[2]
+    assert second[2]["If-None-Match"] == '"e1"'
+    assert second[2]["Authorization"] == "Bearer tok"
+    assert first[3] and second[3]
+
+def test_probe_commits_etag_request_error(monkeypatch):
+    import requests
+    from src.repo_miner import _probe_commits_etag
+    def fake_get(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    assert _probe_commits_etag("any/repo", '"e1"') == (False, None)
+
+def test_fetch_commits_to_csv(tmp_path):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    commits = [
+        DummyCommit("sha1", "Alice", "a@example.com", now, "Initial commit\nDetails"),
+        DummyCommit("sha2", "Bob", "b@example.com", now, "Bug fix"),
+        DummyCommit("sha3", "Charlie", "c@example.com", now, "Unfetched"),
+    ]
+    gh_instance._repo = DummyRepo(commits)
+
+    out = tmp_path / "commits.csv"
+    count = fetch_commits_to_csv("any/repo", str(out), max_commits=2)
+    assert count == 2
+    df = pd.read_csv(out)
+    assert list(df.columns) == ["sha", "author", "email", "date", "message"]
+    assert list(df["sha"]) == ["sha1", "sha2"]
+    assert df.iloc[0]["message"] == "Initial commit"
+    assert df.iloc[0]["date"] == "2025-01-01T12:00:00"
+
+def test_fetch_commits_to_csv_cache_matches_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    no_author = DummyCommit("sha2", None, None, None, "No author")
+    no_author.commit.author = None
+    gh_instance._repo = DummyRepo([
+        DummyCommit("sha1", "Alice", "a@example.com", now, "Initial commit\nDetails"),
+        no_author,
+    ])
+
+    streamed = tmp_path / "streamed.csv"
+    cached = tmp_path / "cached.csv"
+    fetch_commits_to_csv("any/repo", str(streamed))
+    assert fetch_commits_to_csv("any/repo", str(cached), cache_dir=str(tmp_path)) == 2
+    assert cached.read_text() == streamed.read_text()
+    assert '"2025-01-01T12:00:00+00:00"' in cached.read_text()
+
+def test_parse_last_page():
+    link = ('<https://api.github.com/repositories/1/commits?per_page=100&page=2>; rel="next", '
+            '<https://api.github.com/repositories/1/commits?per_page=100&page=37>; rel="last"')
+    assert _parse_last_page(link) == 37
+    assert _parse_last_page(None) == 1
+
+def test_normalize_rest_commit():
+    item = {
+        "sha": "sha1",
+        "commit": {
+            "author": {"name": "Alice", "email": "a@example.com", "date": "2025-01-01T12:00:00Z"},
+            "message": "Initial commit\nDetails",
+        },
+    }
+    assert _normalize_rest_commit(item) == (
+        "sha1", "Alice", "a@example.com", "2025-01-01T12:00:00+00:00", "Initial commit\nDetails")
+
+def test_normalize_graphql_commit():
+    node = {
+        "oid": "sha1",
+        "messageHeadline": "Initial commit",
+        "author": {"name": "Alice", "email": "a@example.com", "date": "2025-01-01T04:00:00-08:00"},
+    }
+    assert _normalize_graphql_commit(node) == (
+        "sha1", "Alice", "a@example.com", "2025-01-01T04:00:00-08:00", "Initial commit")
+
+def test_parse_git_log():
+    # Records split across chunks, and a subject containing a comma
+    chunks = [
+        "sha1\x1fAlice\x1fa@example.com\x1f2025-01-01T12:00:00+01:00\x1fFix a, b\x1e\n",
+        "sha2\x1fBob\x1fb@exa",
+        "mple.com\x1f2025-01-01T11:00:00+00:00\x1f\x1e",
+    ]
+    rows = list(_parse_git_log(chunks))
+    assert rows == [
+        ("sha1", "Alice", "a@example.com", "2025-01-01T12:00:00+01:00", "Fix a, b"),
+        ("sha2", "Bob", "b@example.com", "2025-01-01T11:00:00+00:00", None),
+    ]
+
+class DummyResponse:
+    def __init__(self, body, headers=None):
+        self.status_code = 200
+        self.headers = headers or {}
+        self._body = body
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return self._body
+
+class DummySession:
+    """Fake requests.Session serving `total` REST commits, 2 per page."""
+    def __init__(self, total=5):
+        self.total = total
+        self.calls = []
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        pass
+    def mount(self, prefix, adapter):
+        pass
+    def get(self, url, params=None, headers=None, timeout=None):
+        page = params["page"]
+        self.calls.append((page, headers["Authorization"], timeout))
+        items = [{"sha": f"sha{i}",
+                  "commit": {"author": {"name": "Alice", "email": "a@example.com",
+                                        "date": "2025-01-01T12:00:00Z"},
+                             "message": f"Commit {i}\nDetails"}}
+                 for i in range((page - 1) * 2, min(page * 2, self.total))]
+        last = -(-self.total // 2)
+        return DummyResponse(items, {"Link": f'<https://x/?per_page=2&page={last}>; rel="last"'})
+
+def test_fetch_pages_threaded_keeps_page_order():
+    session = DummySession(total=12)
+    bodies = _fetch_pages_threaded("any/repo", TokenPool(["tok"]), range(2, 7), session,
+                                   max_workers=3)
+    assert [body[0]["sha"] for body in bodies] == ["sha2", "sha4", "sha6", "sha8", "sha10"]
+    assert len(session.calls) == 5
+    assert all(auth == "Bearer tok" for _, auth, _ in session.calls)
+    assert all(timeout for _, _, timeout in session.calls)
+
+def test_fetch_commits_threads_http_client(monkeypatch):
+    import requests
+    session = DummySession(total=5)
+    monkeypatch.setattr(requests, "Session", lambda: session)
+    monkeypatch.setattr("src.repo_miner.COMMITS_PER_PAGE", 2)
+    monkeypatch.setenv("GITHUB_TOKENS", "t1,t2")
+
+    df = fetch_commits("any/repo", concurrency=2, http_client="threads")
+    assert list(df["sha"]) == [f"sha{i}" for i in range(5)]
+    assert df.iloc[0]["message"] == "Commit 0"
+    # Requests are spread over the token pool, not pinned to the first token
+    assert {auth for _, auth, _ in session.calls} == {"Bearer t1", "Bearer t2"}
+
+def test_fetch_commits_cached_rerun_stops_at_cached_head(tmp_path, monkeypatch):
+    import requests
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    session = DummySession(total=5)
+    monkeypatch.setattr(requests, "Session", lambda: session)
+    monkeypatch.setattr("src.repo_miner.COMMITS_PER_PAGE", 2)
+    assert len(fetch_commits("any/repo", concurrency=2, http_client="threads",
+                             cache_dir=str(tmp_path))) == 5
+
+    # The cached head is on page 1, so no later page is requested again
+    session.calls.clear()
+    df = fetch_commits("any/repo", concurrency=2, http_client="threads",
+                       cache_dir=str(tmp_path))
+    assert [page for page, _, _ in session.calls] == [1]
+    assert list(df["sha"]) == [f"sha{i}" for i in range(5)]
+
+def test_cli_rejects_http_without_concurrency(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["repo_miner", "fetch-commits", "--repo", "any/repo",
+                                     "--out", str(tmp_path / "c.csv"), "--http", "threads"])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    assert "--concurrency" in capsys.readouterr().err
+    assert not (tmp_path / "c.csv").exists()
+
+def test_format_date_converts_to_utc():
+    assert _format_date("2025-01-01T04:00:00-08:00") == "2025-01-01T12:00:00+00:00"
+    assert _format_date("2025-01-01T12:00:00Z") == "2025-01-01T12:00:00+00:00"
+    assert _format_date(datetime(2025, 1, 1, 12, 0, 0)) == "2025-01-01T12:00:00"
+    assert _format_date(None) == "Unknown"
+
+def make_git_repo(path, author_dates):
+    """Create a repository at `path` with one empty commit per author date."""
+    subprocess.run(["git", "init", "--quiet", str(path)], check=True)
+    for i, date in enumerate(author_dates):
+        env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        subprocess.run(["git", "-C", str(path), "-c", "user.name=Alice",
+                        "-c", "user.email=a@example.com", "commit", "--quiet",
+                        "--allow-empty", "-m", f"Commit {i}"], check=True, env=env)
+
+def test_fetch_commits_git_source_writes_utc_dates(tmp_path, monkeypatch, capsys):
+    origin = tmp_path / "origin"
+    make_git_repo(origin, ["2025-01-01T12:00:00+01:00", "2025-01-02T12:00:00-05:00"])
+    monkeypatch.setattr("src.repo_miner.GIT_CLONE_URL", str(origin))
+
+    out = tmp_path / "commits.csv"
+    assert fetch_commits_to_csv("any/repo", str(out), source="git") == 2
+    df = pd.read_csv(out)
+    assert list(df["date"]) == ["2025-01-02T17:00:00+00:00", "2025-01-01T11:00:00+00:00"]
+    assert list(df["message"]) == ["Commit 1", "Commit 0"]
+
+    # The CSV must be usable by the summarize sub-command
+    issues = pd.DataFrame({"state": [], "created_at": [], "closed_at": []})
+    merge_and_summarize(df, issues)
+    assert "Alice: 2 commits" in capsys.readouterr().out
+
+def test_fetch_commits_git_source_empty_repo(tmp_path, monkeypatch):
+    origin = tmp_path / "origin"
+    make_git_repo(origin, [])
+    monkeypatch.setattr("src.repo_miner.GIT_CLONE_URL", str(origin))
+
+    df = fetch_commits("any/repo", source="git")
+    assert len(df) == 0
+
+def test_fetch_commits_git_source_falls_back_without_git(tmp_path, monkeypatch):
+    # No git binary on PATH: the clone raises FileNotFoundError
+    monkeypatch.setenv("PATH", str(tmp_path))
+    gh_instance._repo = DummyRepo(make_commits(0, 3))
+
+    with pytest.warns(UserWarning, match="falling back to the REST API"):
+        df = fetch_commits("any/repo", source="git")
+    assert list(df["sha"]) == ["sha2", "sha1", "sha0"]
+
+def test_fetch_commits_git_source_keeps_clone_in_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.repo_miner._probe_commits_etag',
+                        lambda repo_name, etag=None: (False, None))
+    origin = tmp_path / "origin"
+    make_git_repo(origin, ["2025-01-01T12:00:00+00:00"])
+    monkeypatch.setattr("src.repo_miner.GIT_CLONE_URL", str(origin))
+    cache_dir = tmp_path / "cache"
+
+    assert len(fetch_commits("any/repo", source="git", cache_dir=str(cache_dir))) == 1
+    assert (cache_dir / "any_repo.git" / "HEAD").exists()
+
+    # The kept clone is updated with `git fetch` and sees the new commit
+    env = {**os.environ, "GIT_AUTHOR_DATE": "2025-01-02T12:00:00+00:00",
+           "GIT_COMMITTER_DATE": "2025-01-02T12:00:00+00:00"}
+    subprocess.run(["git", "-C", str(origin), "-c", "user.name=Bob",
+                    "-c", "user.email=b@example.com", "commit", "--quiet",
+                    "--allow-empty", "-m", "Commit 1"], check=True, env=env)
+    df = fetch_commits("any/repo", source="git", cache_dir=str(cache_dir))
+    assert list(df["message"]) == ["Commit 1", "Commit 0"]
+
+def rest_commit(i):
+    return {"sha": f"sha{i}",
+            "commit": {"author": {"name": "Alice", "email": "a@example.com",
+                                  "date": "2025-01-01T12:00:00Z"},
+                       "message": f"Commit {i}"}}
+
+def run_against_app(monkeypatch, routes, coro_fn):
+    """
+    Serve `routes` ([(method, path, handler)]) from a local aiohttp app with
+    GITHUB_API_URL pointed at it, and return the result of `coro_fn()`.
+    """
+    from aiohttp import web
+
+    async def main():
+        app = web.Application()
+        for method, path, handler in routes:
+            app.router.add_route(method, path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        monkeypatch.setattr("src.repo_miner.GITHUB_API_URL", f"http://{host}:{port}")
+        try:
+            return await coro_fn()
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+def rest_commits_handler(total, served_pages):
+    """aiohttp handler serving `total` REST commits newest-first, recording pages."""
+    from aiohttp import web
+
+    async def handler(request):
+        page = int(request.query["page"])
+        per_page = int(request.query["per_page"])
+        served_pages.append(page)
+        # Answer later pages first so ordering really depends on gather()
+        await asyncio.sleep(0.01 * max(0, 6 - page))
+        items = [rest_commit(i) for i in range((page - 1) * per_page, min(page * per_page, total))]
+        last = -(-total // per_page)
+        return web.json_response(items, headers={
+            "Link": f'<http://x/commits?per_page={per_page}&page={last}>; rel="last"'})
+    return handler
+
+def test_fetch_commits_async_orders_pages(monkeypatch):
+    served = []
+    routes = [("GET", "/repos/o/r/commits", rest_commits_handler(450, served))]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_async("o/r", None, ["tok"], concurrency=4))
+    assert [row[0] for row in rows] == [f"sha{i}" for i in range(450)]
+    assert sorted(served) == [1, 2, 3, 4, 5]
+
+def test_fetch_commits_async_caps_pages_to_max_commits(monkeypatch):
+    served = []
+    routes = [("GET", "/repos/o/r/commits", rest_commits_handler(1000, served))]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_async("o/r", 150, ["tok"], concurrency=4))
+    assert [row[0] for row in rows] == [f"sha{i}" for i in range(150)]
+    assert sorted(served) == [1, 2]
+
+def test_fetch_commits_async_stops_at_stop_sha(monkeypatch):
+    served = []
+    monkeypatch.setattr("src.repo_miner.COMMITS_PER_PAGE", 2)
+    routes = [("GET", "/repos/o/r/commits", rest_commits_handler(20, served))]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_async("o/r", None, ["tok"], concurrency=2,
+                                                        stop_sha="sha5"))
+    # sha5 is on page 3: the batch of pages 2-3 is the last one requested
+    assert [row[0] for row in rows] == [f"sha{i}" for i in range(6)]
+    assert sorted(served) == [1, 2, 3]
+
+def test_fetch_commits_async_retries_rate_limits(monkeypatch):
+    from aiohttp import web
+    seen = []
+
+    async def handler(request):
+        auth = request.headers["Authorization"]
+        seen.append(auth)
+        if auth == "Bearer t1":
+            # Primary limit: t1 is exhausted, the retry must rotate to t2
+            return web.json_response({}, status=403, headers={
+                "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "9999999999"})
+        if seen.count(auth) == 1:
+            # Secondary limit: wait Retry-After, then retry
+            return web.json_response({}, status=429, headers={"Retry-After": "0"})
+        return web.json_response([rest_commit(0)])
+
+    routes = [("GET", "/repos/o/r/commits", handler)]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_async("o/r", None, ["t1", "t2"]))
+    assert [row[0] for row in rows] == ["sha0"]
+    assert seen == ["Bearer t1", "Bearer t2", "Bearer t2"]
+
+def test_fetch_commits_async_gives_up_after_retries(monkeypatch):
+    from aiohttp import web
+
+    async def handler(request):
+        return web.json_response({}, status=429, headers={"Retry-After": "0"})
+
+    monkeypatch.setattr("src.repo_miner.MAX_RETRIES", 2)
+    routes = [("GET", "/repos/o/r/commits", handler)]
+    with pytest.raises(RuntimeError, match="retries exhausted"):
+        run_against_app(monkeypatch, routes,
+                        lambda: _fetch_commits_async("o/r", None, ["tok"]))
+
+def graphql_handler(total, sent_variables):
+    """aiohttp handler serving `total` commits through the GraphQL history connection."""
+    from aiohttp import web
+
+    async def handler(request):
+        variables = (await request.json())["variables"]
+        sent_variables.append(variables)
+        start = int(variables["after"] or 0)
+        stop = min(start + variables["first"], total)
+        nodes = [{"oid": f"sha{i}", "messageHeadline": f"Commit {i}",
+                  "author": {"name": "Alice", "email": "a@example.com",
+                             "date": "2025-01-01T12:00:00Z"}}
+                 for i in range(start, stop)]
+        history = {"nodes": nodes,
+                   "pageInfo": {"hasNextPage": stop < total, "endCursor": str(stop)}}
+        return web.json_response({"data": {"repository": {
+            "defaultBranchRef": {"target": {"history": history}}}}})
+    return handler
+
+def test_fetch_commits_graphql_follows_end_cursor(monkeypatch):
+    sent = []
+    routes = [("POST", "/graphql", graphql_handler(250, sent))]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_graphql("o/r", None, ["tok"]))
+    assert [row[0] for row in rows] == [f"sha{i}" for i in range(250)]
+    assert [v["after"] for v in sent] == [None, "100", "200"]
+    assert {(v["owner"], v["name"], v["first"]) for v in sent} == {("o", "r", 100)}
+
+def test_fetch_commits_graphql_sizes_last_page_to_max_commits(monkeypatch):
+    sent = []
+    routes = [("POST", "/graphql", graphql_handler(1000, sent))]
+    rows = run_against_app(monkeypatch, routes,
+                           lambda: _fetch_commits_graphql("o/r", 150, ["tok"]))
+    assert len(rows) == 150
+    assert [v["first"] for v in sent] == [100, 50]
+
+def test_fetch_commits_graphql_empty_repo(monkeypatch):
+    from aiohttp import web
+
+    async def handler(request):
+        return web.json_response({"data": {"repository": {"defaultBranchRef": None}}})
+
+    rows = run_against_app(monkeypatch, [("POST", "/graphql", handler)],
+                           lambda: _fetch_commits_graphql("o/r", None, ["tok"]))
+    assert rows == []
+
+def test_fetch_commits_graphql_errors_raise(monkeypatch):
+    from aiohttp import web
+
+    async def handler(request):
+        return web.json_response({"data": None,
+                                  "errors": [{"message": "Could not resolve to a Repository"}]})
+
+    with pytest.raises(RuntimeError, match="Could not resolve to a Repository"):
+        run_against_app(monkeypatch, [("POST", "/graphql", handler)],
+                        lambda: _fetch_commits_graphql("o/r", None, ["tok"]))
+
+def test_token_pool_prefers_most_remaining():
+    pool = TokenPool(["t1", "t2"])
+    pool.update("t1", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"})
+    pool.update("t2", {"X-RateLimit-Remaining": "42", "X-RateLimit-Reset": "0"})
+    assert asyncio.run(pool.acquire()) == "t2"
+
+def test_token_pool_waits_for_earliest_reset(monkeypatch):
+    # Fake clock: sleeping advances it instead of blocking
+    clock = {"now": 1000.0}
+    sleeps = []
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+    monkeypatch.setattr("src.repo_miner.time.time", lambda: clock["now"])
+    monkeypatch.setattr("src.repo_miner.asyncio.sleep", fake_sleep)
+
+    pool = TokenPool(["t1", "t2"])
+    pool.update("t1", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1100"})
+    pool.update("t2", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1050"})
+
+    # All exhausted: sleep until t2's reset, then only t2 is refilled
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(pool.acquire()) == "t2"
+        assert sleeps == [50.0]
+        assert loop.run_until_complete(pool.acquire()) == "t2"
+        assert sleeps == [50.0]
+    finally:
+        loop.close()
+
+def test_token_pool_acquire_blocking_waits_for_reset(monkeypatch):
+    clock = {"now": 1000.0}
+    sleeps = []
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+    monkeypatch.setattr("src.repo_miner.time.time", lambda: clock["now"])
+    monkeypatch.setattr("src.repo_miner.time.sleep", fake_sleep)
+
+    pool = TokenPool(["t1"])
+    pool.update("t1", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"})
+    assert pool.acquire_blocking() == "t1"
+    assert sleeps == [30.0]
+
 def test_fetch_issues_excludes_prs(monkeypatch):
     now = datetime.now()
     issues = [
@@ -148,6 +745,17 @@ def test_fetch_issues_excludes_prs(monkeypatch):
     assert len(df) == 1
     assert df.iloc[0]["title"] == "Real issue"
 
+def test_fetch_issues_reads_github_tokens(monkeypatch):
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setenv("GITHUB_TOKENS", "t1,t2")
+    now = datetime.now()
+    gh_instance._repo = DummyRepoIssues([
+        DummyIssue(1, 101, "Real issue", "alice", "open", now, None, 2),
+    ])
+
+    df = fetch_issues("any/repo", state="all")
+    assert len(df) == 1
+
 def test_fetch_issues_dates_are_iso(monkeypatch):
     now = datetime(2025, 9, 25, 15, 30, 0)
     issues = [